@@ -38,6 +38,16 @@ class UnderlayInsetWarning(ValidationWarning):
                     "Ink/Stitch will ignore it and will use the original size instead.")
 
 
+@cache
+def _parse_angles(angles):
+    """Parse a comma-separated list of angles in degrees into radians.
+
+    Many elements share the same setting, so the result is cached across
+    elements.  It is a tuple to make sure callers can't modify it.
+    """
+    return tuple(math.radians(float(angle)) for angle in angles.strip().split(','))
+
+
 class AutoFill(Fill):
     element_name = _("AutoFill")
 
@@ -56,6 +66,16 @@ class AutoFill(Fill):
     def outline_length(self):
         return self.outline.length
 
+    @property
+    @cache
+    def _centroid(self):
+        return self.shape.centroid
+
+    @property
+    @cache
+    def _area(self):
+        return self.shape.area
+
     @property
     def flip(self):
         return False
@@ -87,9 +107,8 @@ class AutoFill(Fill):
         underlay_angles = self.get_param('fill_underlay_angle', None)
         default_value = [self.angle + math.pi / 2.0]
         if underlay_angles is not None:
-            underlay_angles = underlay_angles.strip().split(',')
             try:
-                underlay_angles = [math.radians(float(angle)) for angle in underlay_angles]
+                underlay_angles = list(_parse_angles(underlay_angles))
             except (TypeError, ValueError):
                 return default_value
         else:
@@ -189,10 +208,12 @@ class AutoFill(Fill):
             return self.shape
 
     @property
+    @cache
     def underlay_shape(self):
         return self.shrink_or_grow_shape(-self.fill_underlay_inset)
 
     @property
+    @cache
     def fill_shape(self):
         return self.shrink_or_grow_shape(self.expand)
 
@@ -220,28 +241,39 @@ class AutoFill(Fill):
         ending_point = self.get_ending_point()
 
         try:
+            # params are looked up (and parsed) on every access, so only read them once
+            color = self.color
+            running_stitch_length = self.running_stitch_length
+            staggers = self.staggers
+
             if self.fill_underlay:
-                for i in range(len(self.fill_underlay_angle)):
+                underlay_shape = self.underlay_shape
+                underlay_row_spacing = self.fill_underlay_row_spacing
+                underlay_max_stitch_length = self.fill_underlay_max_stitch_length
+                underlay_skip_last = self.fill_underlay_skip_last
+                underlay_underpath = self.underlay_underpath
+
+                for angle in self.fill_underlay_angle:
                     underlay = StitchGroup(
-                        color=self.color,
+                        color=color,
                         tags=("auto_fill", "auto_fill_underlay"),
                         stitches=auto_fill(
-                            self.underlay_shape,
-                            self.fill_underlay_angle[i],
-                            self.fill_underlay_row_spacing,
-                            self.fill_underlay_row_spacing,
-                            self.fill_underlay_max_stitch_length,
-                            self.running_stitch_length,
-                            self.staggers,
-                            self.fill_underlay_skip_last,
+                            underlay_shape,
+                            angle,
+                            underlay_row_spacing,
+                            underlay_row_spacing,
+                            underlay_max_stitch_length,
+                            running_stitch_length,
+                            staggers,
+                            underlay_skip_last,
                             starting_point,
-                            underpath=self.underlay_underpath))
+                            underpath=underlay_underpath))
                     stitch_groups.append(underlay)
 
                     starting_point = underlay.stitches[-1]
 
             stitch_group = StitchGroup(
-                color=self.color,
+                color=color,
                 tags=("auto_fill", "auto_fill_top"),
                 stitches=auto_fill(
                     self.fill_shape,
@@ -249,8 +281,8 @@ class AutoFill(Fill):
                     self.row_spacing,
                     self.end_row_spacing,
                     self.max_stitch_length,
-                    self.running_stitch_length,
-                    self.staggers,
+                    running_stitch_length,
+                    staggers,
                     self.skip_last,
                     starting_point,
                     ending_point,
@@ -275,17 +307,16 @@ class AutoFill(Fill):
 
         return stitch_groups
 
+    def validation_warnings(self):
+        if self._area < 20:
+            label = self.node.get(INKSCAPE_LABEL) or self.node.get("id")
+            yield SmallShapeWarning(self._centroid, label)
 
-def validation_warnings(self):
-    if self.shape.area < 20:
-        label = self.node.get(INKSCAPE_LABEL) or self.node.get("id")
-        yield SmallShapeWarning(self.shape.centroid, label)
-
-    if self.shrink_or_grow_shape(self.expand, True).is_empty:
-        yield ExpandWarning(self.shape.centroid)
+        if self.shrink_or_grow_shape(self.expand, True).is_empty:
+            yield ExpandWarning(self._centroid)
 
-    if self.shrink_or_grow_shape(-self.fill_underlay_inset, True).is_empty:
-        yield UnderlayInsetWarning(self.shape.centroid)
+        if self.shrink_or_grow_shape(-self.fill_underlay_inset, True).is_empty:
+            yield UnderlayInsetWarning(self._centroid)
 
-    for warning in super(AutoFill, self).validation_warnings():
-        yield warning
+        for warning in super(AutoFill, self).validation_warnings():
+            yield warning
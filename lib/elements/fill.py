@@ -7,9 +7,22 @@ import logging
 import math
 import re
 
+import numpy
 from shapely import geometry as shgeo
 from shapely.validation import explain_validity
 
+try:
+    from shapely import linearrings, multipolygons, polygons
+except ImportError:
+    # shapely < 2.0
+    polygons = None
+
+try:
+    from shapely.validation import make_valid
+except ImportError:
+    # shapely < 1.8
+    make_valid = None
+
 from .element import EmbroideryElement, param
 from .validation import ValidationError
 from ..i18n import _
@@ -18,6 +31,10 @@ from ..stitches import legacy_fill
 from ..svg import PIXELS_PER_MM
 from ..utils import cache
 
+# parse the output of shapely's explain_validity(), e.g. "Self-intersection[12.3 -4.5]"
+VALIDITY_MESSAGE_RE = re.compile(r".+?(?=\[)")
+VALIDITY_MESSAGE_AND_LOCATION_RE = re.compile(r".+?(?=\[)|-?\d+(?:\.\d+)?")
+
 
 class UnconnectedError(ValidationError):
     name = _("Unconnected")
@@ -37,6 +54,46 @@ class InvalidShapeError(ValidationError):
     ]
 
 
+def _path_area(path):
+    """Area of the polygon enclosed by path (shoelace formula)."""
+    coords = numpy.asarray(path, dtype=numpy.float64)
+    x = coords[:, 0]
+    y = coords[:, 1]
+    return 0.5 * abs(numpy.dot(x, numpy.roll(y, -1)) - numpy.dot(y, numpy.roll(x, -1)))
+
+
+def _paths_to_multi_polygon(paths):
+    """Build a MultiPolygon with paths[0] as shell and paths[1:] as holes."""
+    if polygons is None:
+        return shgeo.MultiPolygon([(paths[0], paths[1:])])
+
+    # the vectorized constructors skip shapely's slow python constructor path
+    holes = [linearrings(path) for path in paths[1:]] or None
+    return multipolygons([polygons(linearrings(paths[0]), holes=holes)])
+
+
+def _repair_polygon(polygon):
+    """Try to fix an invalid polygon.  Returns the largest polygon of the result or None."""
+    if make_valid is not None:
+        repaired = make_valid(polygon)
+    else:
+        repaired = polygon.buffer(0)
+
+    # the result may be a (multi)polygon or a collection which can also contain lines
+    parts = list(_iter_polygons(repaired))
+    if parts:
+        return max(parts, key=lambda part: part.area)
+    return None
+
+
+def _iter_polygons(geometry):
+    if isinstance(geometry, shgeo.Polygon):
+        yield geometry
+    elif hasattr(geometry, 'geoms'):
+        for part in geometry.geoms:
+            yield from _iter_polygons(part)
+
+
 class Fill(EmbroideryElement):
     element_name = _("Fill")
 
@@ -141,31 +198,33 @@ class Fill(EmbroideryElement):
         # from the first. So let's at least make sure the "first" thing is the
         # biggest path.
         paths = self.paths
-        paths.sort(key=lambda point_list: shgeo.Polygon(point_list).area, reverse=True)
+        areas = [_path_area(path) for path in paths]
+        order = sorted(range(len(paths)), key=lambda i: areas[i], reverse=True)
+        paths[:] = [paths[i] for i in order]
+        areas = [areas[i] for i in order]
         # Very small holes will cause a shape to be rendered as an outline only
         # they are too small to be rendered and only confuse the auto_fill algorithm.
         # So let's ignore them
-        if shgeo.Polygon(paths[0]).area > 5 and shgeo.Polygon(paths[-1]).area < 5:
-            paths = [path for path in paths if shgeo.Polygon(path).area > 3]
+        if areas[0] > 5 and areas[-1] < 5:
+            paths = [path for path, area in zip(paths, areas) if area > 3]
 
-        polygon = shgeo.MultiPolygon([(paths[0], paths[1:])])
+        polygon = _paths_to_multi_polygon(paths)
 
         # There is a great number of "crossing border" errors on fill shapes
-        # If the polygon fails, we can try to run buffer(0) on the polygon in the
-        # hope it will fix at least some of them
+        # If the polygon fails, we can try to run make_valid (or buffer(0) on
+        # older shapely versions) on the polygon in the hope it will fix at
+        # least some of them
         if not self.shape_is_valid(polygon):
             why = explain_validity(polygon)
-            message = re.match(r".+?(?=\[)", why)
+            message = VALIDITY_MESSAGE_RE.match(why)
             if message.group(0) == "Self-intersection":
-                buffered = polygon.buffer(0)
-                # if we receive a multipolygon, only use the first one of it
-                if type(buffered) == shgeo.MultiPolygon:
-                    buffered = buffered[0]
+                # if we receive multiple polygons, only use the largest one of them
+                repaired = _repair_polygon(polygon)
                 # we do not want to break apart into multiple objects (possibly in the future?!)
                 # best way to distinguish the resulting polygon is to compare the area size of the two
                 # and make sure users will not experience significantly altered shapes without a warning
-                if type(buffered) == shgeo.Polygon and math.isclose(polygon.area, buffered.area, abs_tol=0.5):
-                    polygon = shgeo.MultiPolygon([buffered])
+                if repaired is not None and math.isclose(polygon.area, repaired.area, abs_tol=0.5):
+                    polygon = shgeo.MultiPolygon([repaired])
 
         return polygon
 
@@ -185,7 +244,7 @@ class Fill(EmbroideryElement):
     def validation_errors(self):
         if not self.shape_is_valid(self.shape):
             why = explain_validity(self.shape)
-            message, x, y = re.findall(r".+?(?=\[)|-?\d+(?:\.\d+)?", why)
+            message, x, y = VALIDITY_MESSAGE_AND_LOCATION_RE.findall(why)
 
             # I Wish this weren't so brittle...
             if "Hole lies outside shell" in message:
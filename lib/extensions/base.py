@@ -17,7 +17,7 @@ from ..commands import is_command, layer_commands
 from ..elements import EmbroideryElement, nodes_to_elements
 from ..elements.clone import is_clone
 from ..i18n import _
-from ..patterns import is_pattern
+from ..patterns import clear_pattern_cache, is_pattern
 from ..svg import generate_unique_id
 from ..svg.tags import (CONNECTOR_TYPE, EMBROIDERABLE_TAGS, INKSCAPE_GROUPMODE,
                         NOT_EMBROIDERABLE_TAGS, SVG_CLIPPATH_TAG, SVG_DEFS_TAG,
@@ -197,6 +197,7 @@ class InkstitchExtension(inkex.Effect):
         return selected
 
     def elements_to_stitch_groups(self, elements):
+        clear_pattern_cache()
         patches = []
         for element in elements:
             if patches:
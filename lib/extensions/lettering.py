@@ -17,6 +17,7 @@ from ..elements import nodes_to_elements
 from ..gui import PresetsPanel, SimulatorPreview, info_dialog
 from ..i18n import _
 from ..lettering import Font, FontError
+from ..patterns import clear_pattern_cache
 from ..svg import get_correction_transform
 from ..svg.tags import (INKSCAPE_LABEL, INKSTITCH_LETTERING, SVG_GROUP_TAG,
                         SVG_PATH_TAG)
@@ -286,6 +287,7 @@ class LetteringFrame(wx.Frame):
         try:
             self.update_lettering()
             elements = nodes_to_elements(self.group.iterdescendants(SVG_PATH_TAG))
+            clear_pattern_cache()
 
             for element in elements:
                 if abort_early and abort_early.is_set():
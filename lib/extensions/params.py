@@ -20,6 +20,7 @@ from ..elements import (AutoFill, Clone, EmbroideryElement, Fill, Polyline,
 from ..elements.clone import is_clone
 from ..gui import PresetsPanel, SimulatorPreview, WarningPanel
 from ..i18n import _
+from ..patterns import clear_pattern_cache
 from ..svg.tags import SVG_POLYLINE_TAG
 from ..utils import get_resource_dir
 from .base import InkstitchExtension
@@ -393,6 +394,7 @@ class SettingsFrame(wx.Frame):
 
         try:
             wx.CallAfter(self._hide_warning)
+            clear_pattern_cache()
             for node in nodes:
                 if abort_early.is_set():
                     # cancel; params were updated and we need to start over
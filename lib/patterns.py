@@ -3,9 +3,21 @@
 # Copyright (c) 2010 Authors
 # Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
 
+from itertools import compress
+
 import inkex
+import numpy
 from shapely import geometry as shgeo
 
+try:
+    from shapely import (contains_xy, get_coordinates, get_type_id,
+                         intersection, linestrings, prepare)
+except ImportError:
+    # shapely < 2.0
+    from shapely.vectorized import contains as contains_xy
+    linestrings = None
+    prepare = None
+
 from .stitch_plan import Stitch
 from .svg.tags import EMBROIDERABLE_TAGS
 from .utils import Point
@@ -27,44 +39,114 @@ def apply_patterns(patches, node):
 def _apply_stroke_patterns(patterns, patches):
     for pattern in patterns:
         for patch in patches:
+            if linestrings is None:
+                # shapely < 2.0 can't intersect geometries in bulk
+                _apply_stroke_pattern_by_segment(pattern, patch)
+                continue
+
+            if len(patch.stitches) < 2:
+                continue
+
+            segment_indices, points = _get_pattern_points_by_segment(patch.get_coordinates(), pattern)
+            if not len(points):
+                continue
+
+            # splice the pattern points in after the first stitch of their segment
             patch_points = []
-            for i, stitch in enumerate(patch.stitches):
-                patch_points.append(stitch)
-                if i == len(patch.stitches) - 1:
-                    continue
-                intersection_points = _get_pattern_points(stitch, patch.stitches[i+1], pattern)
-                for point in intersection_points:
-                    patch_points.append(Stitch(point, tags=('pattern_point',)))
+            start = 0
+            for end, (x, y) in zip((segment_indices + 1).tolist(), points.tolist()):
+                patch_points.extend(patch.stitches[start:end])
+                patch_points.append(Stitch(x, y, tags=('pattern_point',)))
+                start = end
+            patch_points.extend(patch.stitches[start:])
             patch.stitches = patch_points
 
 
+def _apply_stroke_pattern_by_segment(pattern, patch):
+    patch_points = []
+    for i, stitch in enumerate(patch.stitches):
+        patch_points.append(stitch)
+        if i == len(patch.stitches) - 1:
+            continue
+        intersection_points = _get_pattern_points(stitch, patch.stitches[i+1], pattern)
+        for point in intersection_points:
+            patch_points.append(Stitch(point, tags=('pattern_point',)))
+    patch.stitches = patch_points
+
+
 def _apply_fill_patterns(patterns, patches):
-    for pattern in patterns:
-        for patch in patches:
-            patch_points = []
-            for i, stitch in enumerate(patch.stitches):
-                if not shgeo.Point(stitch).within(pattern):
-                    # keep points outside the fill pattern
-                    patch_points.append(stitch)
-                elif i - 1 < 0 or i >= len(patch.stitches) - 1:
-                    # keep start and end points
-                    patch_points.append(stitch)
-                elif stitch.has_tag('fill_row_start') or stitch.has_tag('fill_row_end'):
-                    # keep points if they are the start or end of a fill stitch row
-                    patch_points.append(stitch)
-                elif stitch.has_tag('auto_fill') and not stitch.has_tag('auto_fill_top'):
-                    # keep auto-fill underlay
-                    patch_points.append(stitch)
-                elif stitch.has_tag('auto_fill_travel'):
-                    # keep travel stitches (underpath or travel around the border)
-                    patch_points.append(stitch)
-                elif stitch.has_tag('satin_column') and not stitch.has_tag('satin_split_stitch'):
-                    # keep satin column stitches unless they are split stitches
-                    patch_points.append(stitch)
-            patch.stitches = patch_points
+    if not patterns:
+        return
+
+    for patch in patches:
+        if len(patch.stitches) < 3:
+            # only start and end points, nothing to remove
+            continue
+
+        # look up each stitch once and collect the hits of all patterns
+        coords = patch.get_coordinates()
+        inside = numpy.zeros(len(coords), dtype=bool)
+        x = coords[:, 0]
+        y = coords[:, 1]
+        for pattern in patterns:
+            if pattern.is_empty:
+                continue
+            # only stitches within the bounding box of the pattern (and not
+            # already found in another pattern) need the full containment test
+            minx, miny, maxx, maxy = pattern.bounds
+            candidates = numpy.flatnonzero(~inside & (x >= minx) & (x <= maxx) & (y >= miny) & (y <= maxy))
+            if len(candidates):
+                inside[candidates] = contains_xy(pattern, x[candidates], y[candidates])
+
+        # keep points outside the fill patterns
+        keep = ~inside
+        # keep start and end points
+        keep[0] = keep[-1] = True
+
+        for i in numpy.flatnonzero(~keep):
+            keep[i] = _keep_in_fill_pattern(patch.stitches[i])
+
+        patch.stitches = list(compress(patch.stitches, keep))
+
+
+def _keep_in_fill_pattern(stitch):
+    if stitch.has_tag('fill_row_start') or stitch.has_tag('fill_row_end'):
+        # keep points if they are the start or end of a fill stitch row
+        return True
+    elif stitch.has_tag('auto_fill') and not stitch.has_tag('auto_fill_top'):
+        # keep auto-fill underlay
+        return True
+    elif stitch.has_tag('auto_fill_travel'):
+        # keep travel stitches (underpath or travel around the border)
+        return True
+    elif stitch.has_tag('satin_column') and not stitch.has_tag('satin_split_stitch'):
+        # keep satin column stitches unless they are split stitches
+        return True
+    return False
+
+
+# patterns are shared by all elements in a group, so we only look them up
+# once per group.  The group itself is the key (rather than its id()) so
+# that it is kept alive as long as its entry.
+_patterns_cache = {}
+
+
+def clear_pattern_cache():
+    """Forget cached patterns.  Call this before (re-)embroidering elements."""
+    _patterns_cache.clear()
 
 
 def _get_patterns(node):
+    parent = node.getparent()
+    if parent is None:
+        return _find_patterns(node)
+
+    if parent not in _patterns_cache:
+        _patterns_cache[parent] = _find_patterns(node)
+    return _patterns_cache[parent]
+
+
+def _find_patterns(node):
     from .elements import EmbroideryElement
     from .elements.fill import Fill
     from .elements.stroke import Stroke
@@ -83,24 +165,62 @@ def _get_patterns(node):
 
         if fill is not None:
             fill_pattern = Fill(pattern).shape
+            _prepare_pattern(fill_pattern)
             fills.append(fill_pattern)
 
         if stroke is not None:
             stroke_pattern = Stroke(pattern).paths
             line_strings = [shgeo.LineString(path) for path in stroke_pattern]
-            strokes.append(shgeo.MultiLineString(line_strings))
+            stroke_pattern = shgeo.MultiLineString(line_strings)
+            _prepare_pattern(stroke_pattern)
+            strokes.append(stroke_pattern)
 
     return {'fill_patterns': fills, 'stroke_patterns': strokes}
 
 
+def _prepare_pattern(pattern):
+    # Patterns are tested against every stitch.  Prepared geometries build
+    # an index that speeds up these tests.  Shapely < 2.0 can only prepare
+    # into a separate object that the vectorized functions don't accept.
+    if prepare is not None:
+        prepare(pattern)
+
+
 def _get_pattern_points(first, second, pattern):
-    points = []
     intersection = shgeo.LineString([first, second]).intersection(pattern)
     if isinstance(intersection, shgeo.Point):
-        points.append(Point(intersection.x, intersection.y))
-    if isinstance(intersection, shgeo.MultiPoint):
-        for point in intersection:
-            points.append(Point(point.x, point.y))
+        return [Point(intersection.x, intersection.y)]
+    if not isinstance(intersection, shgeo.MultiPoint):
+        return []
+
+    coords = numpy.array([(point.x, point.y) for point in intersection.geoms], dtype=numpy.float64)
     # sort points after their distance to first
-    points.sort(key=lambda point: point.distance(first))
-    return points
+    distances = numpy.hypot(coords[:, 0] - first[0], coords[:, 1] - first[1])
+    coords = coords[numpy.argsort(distances, kind='stable')]
+    return [Point(x, y) for x, y in coords.tolist()]
+
+
+def _get_pattern_points_by_segment(coords, pattern):
+    """Intersect all stitch segments with a stroke pattern in one go.
+
+    coords are the stitch positions as returned by StitchGroup.get_coordinates().
+    Returns the index of the segment and the coordinates of each
+    intersection point, ordered along the stitch path.
+    """
+    first = coords[:-1]
+    second = coords[1:]
+    intersections = intersection(linestrings(numpy.stack([first, second], axis=1)), pattern)
+
+    # just like _get_pattern_points we only care about crossings,
+    # not about segments running along the pattern
+    type_ids = get_type_id(intersections)
+    segments = numpy.flatnonzero((type_ids == 0) | (type_ids == 4))
+    points, indices = get_coordinates(intersections[segments], return_index=True)
+    segment_indices = segments[indices]
+
+    # sort points after their distance to the start of their segment
+    direction = second[segment_indices] - first[segment_indices]
+    distance = ((points - first[segment_indices]) * direction).sum(axis=1)
+    order = numpy.lexsort((distance, segment_indices))
+
+    return segment_indices[order], points[order]
@@ -3,6 +3,8 @@
 # Copyright (c) 2010 Authors
 # Licensed under the GNU GPL version 3.0 or later.  See the file LICENSE for details.
 
+import numpy
+
 from .stitch import Stitch
 
 
@@ -52,6 +54,13 @@ class StitchGroup:
 
         self.stitches.append(stitch)
 
+    def get_coordinates(self):
+        """Return the stitch positions as a numpy array of shape (len(self), 2).
+
+        This is a copy, changing it does not move the stitches.
+        """
+        return numpy.array([stitch.as_tuple() for stitch in self.stitches], dtype=numpy.float64).reshape(-1, 2)
+
     def reverse(self):
         return StitchGroup(self.color, self.stitches[::-1])
 